@@ -1,41 +1,42 @@
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 INPUT_DIR = "scraped_articles"
 OUTPUT_DIR = "cleaned_articles"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Patterns to remove from scraped content
-date_pattern = re.compile(r"\b\d{1,2} \w{3}, \d{1,2}:\d{2} [APM]{2}\b", re.IGNORECASE)
-views_pattern = re.compile(r"^\d+\s+Views?$", re.IGNORECASE)
-comments_pattern = re.compile(r"^\d+\s+Comments?$", re.IGNORECASE)
+# Metadata lines to remove from scraped content (dates, view and comment counts)
+SKIP_RE = re.compile(
+    r"(?:\b\d{1,2} \w{3}, \d{1,2}:\d{2} [APM]{2}\b)"
+    r"|(?:\d+\s+Views?$)"
+    r"|(?:\d+\s+Comments?$)",
+    re.IGNORECASE
+)
+FEEDBACK_SENTINEL = "Was this article helpful?"
 
-for filename in os.listdir(INPUT_DIR):
-    if not filename.endswith(".txt"):
-        continue
 
-    input_path = os.path.join(INPUT_DIR, filename)
-    output_path = os.path.join(OUTPUT_DIR, filename)
-
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    cleaned_lines = []
-    for line in lines:
+def clean_lines(f):
+    """Yield content lines, stopping at the feedback section"""
+    for line in f:
         line = line.strip()
 
         # Stop at feedback section
-        if "Was this article helpful?" in line:
+        if FEEDBACK_SENTINEL in line:
             break
 
-        if not line:
+        if not line or SKIP_RE.match(line):
             continue
 
-        # Skip metadata lines
-        if date_pattern.match(line) or views_pattern.match(line) or comments_pattern.match(line):
-            continue
+        yield line
+
+
+def clean_file(filename):
+    """Clean a single scraped article and write it to the output directory"""
+    input_path = os.path.join(INPUT_DIR, filename)
+    output_path = os.path.join(OUTPUT_DIR, filename)
 
-        cleaned_lines.append(line)
+    with open(input_path, "r", encoding="utf-8") as f:
+        cleaned_lines = list(clean_lines(f))
 
     # Create title from filename
     title = filename.replace(".txt", "").replace("-", " ").replace("_", " ").strip()
@@ -44,4 +45,18 @@ for filename in os.listdir(INPUT_DIR):
     with open(output_path, "w", encoding="utf-8") as f:
         f.write(cleaned_text)
 
-    print(f"Cleaned: {filename}")
\ No newline at end of file
+    return filename
+
+
+def main():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with os.scandir(INPUT_DIR) as entries:
+        filenames = [entry.name for entry in entries if entry.is_file() and entry.name.endswith(".txt")]
+
+    with ProcessPoolExecutor() as executor:
+        for filename in executor.map(clean_file, filenames):
+            print(f"Cleaned: {filename}")
+
+
+if __name__ == "__main__":
+    main()
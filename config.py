@@ -1,5 +1,10 @@
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
+import platform
+from functools import lru_cache
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from langchain_core.embeddings import Embeddings
 from langchain_anthropic import ChatAnthropic
 from dotenv import load_dotenv
 
@@ -8,21 +13,119 @@ load_dotenv()
 # Configuration constants
 ARTICLE_DIR = "cleaned_articles"
 VECTOR_STORE_PATH = "vectorstore"
+VECTOR_STORE_SETTINGS_FILE = "settings.json"  # Saved inside VECTOR_STORE_PATH
+BM25_INDEX_PATH = "bm25.pkl"
 CHUNK_SIZE = 300
 CHUNK_OVERLAP = 50
 TOP_K = 5
 MEMORY_WINDOW = 5
+MAX_CONCURRENT_STREAMS = 8  # In-flight Claude streams, keeps us under rate limits
+STREAM_EDIT_INTERVAL = 1.5  # Minimum seconds between Telegram message edits
+STREAM_EDIT_MIN_CHARS = 64  # Minimum new characters before editing again
+MIN_QUERY_WORDS = 2  # Shorter messages get a canned reply instead of retrieval + Claude
+FAISS_INDEX_TYPE = "SQ8"  # faiss.index_factory string: "Flat", "SQfp16" or "SQ8"
+HNSW_MIN_VECTORS = 100_000  # Switch to approximate HNSW search above this many chunks
+HNSW_M = 32
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = "onnx"  # "torch", "onnx" or "openvino"
 
+
+def _gpu_available():
+    """Check that the embedding backend can actually run on a CUDA GPU"""
+    if not torch.cuda.is_available():
+        return False
+    if EMBEDDING_BACKEND == "onnx":
+        # The CPU-only onnxruntime from sentence-transformers[onnx] has no CUDA provider;
+        # install sentence-transformers[onnx-gpu] (onnxruntime-gpu) to encode on the GPU
+        import onnxruntime
+        return "CUDAExecutionProvider" in onnxruntime.get_available_providers()
+    return EMBEDDING_BACKEND == "torch"
+
+
+EMBEDDING_DEVICE = "cuda" if _gpu_available() else "cpu"
+EMBED_BATCH_SIZE = 256 if EMBEDDING_DEVICE == "cuda" else 64
+# Prebuilt exports shipped with the model: int8 dynamic quantization on CPU, fp16 on GPU
+if EMBEDDING_DEVICE == "cuda":
+    EMBEDDING_ONNX_FILE = "onnx/model_O4.onnx"
+elif platform.machine().lower() in ("arm64", "aarch64"):
+    EMBEDDING_ONNX_FILE = "onnx/model_qint8_arm64.onnx"
+else:
+    EMBEDDING_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+QUERY_CACHE_SIZE = 1024
+
+
+def get_index_type(num_vectors):
+    """faiss.index_factory string for a corpus of num_vectors chunks"""
+    # Exact search is fast enough for small corpora, large ones get an HNSW graph
+    if num_vectors >= HNSW_MIN_VECTORS:
+        return f"HNSW{HNSW_M},{FAISS_INDEX_TYPE}"
+    return FAISS_INDEX_TYPE
+
+
+def get_vectorstore_settings(num_vectors):
+    """Chunking, encoder and index settings a saved vector store must have been built with"""
+    return {
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "embedding_file": EMBEDDING_ONNX_FILE if EMBEDDING_BACKEND == "onnx" else None,
+        "index_type": get_index_type(num_vectors),
+        "num_vectors": num_vectors,
+        "metric": "inner_product"
+    }
+
+
+class KnowledgeBaseEmbeddings(Embeddings):
+    """Sentence-transformers embeddings with numpy batch encoding and a query cache"""
+
+    def __init__(self, model, cache_size=QUERY_CACHE_SIZE):
+        self.model = model
+        self._cached_query = lru_cache(maxsize=cache_size)(self._encode_query)
+
+    def encode(self, texts):
+        """Encode texts into a normalized float32 (N, d) matrix"""
+        vectors = self.model.encode(
+            texts,
+            batch_size=EMBED_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return vectors.astype(np.float32, copy=False)
+
+    def _encode_query(self, text):
+        # Tuples keep cached vectors immutable between callers
+        return tuple(self.encode([text])[0].tolist())
+
+    def embed_documents(self, texts):
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text):
+        # MiniLM is uncased, so case and surrounding whitespace don't change the vector
+        return list(self._cached_query(text.strip().lower()))
+
+
+@lru_cache(maxsize=1)
 def get_embeddings():
-    """Get HuggingFace embeddings model"""
-    return HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2",
+    """Get sentence-transformers embeddings model (loaded once per process)"""
+    model_kwargs = {}
+    if EMBEDDING_BACKEND == "onnx":
+        model_kwargs["file_name"] = EMBEDDING_ONNX_FILE
+
+    model = SentenceTransformer(
+        EMBEDDING_MODEL,
         cache_folder="./models",
-        encode_kwargs={'normalize_embeddings': True}
+        device=EMBEDDING_DEVICE,
+        backend=EMBEDDING_BACKEND,
+        model_kwargs=model_kwargs
     )
+    if EMBEDDING_DEVICE == "cuda" and EMBEDDING_BACKEND == "torch":
+        model.half()  # fp16 halves GPU memory traffic; ranking barely changes
+    return KnowledgeBaseEmbeddings(model)
 
+@lru_cache(maxsize=1)
 def get_llm():
-    """Get Claude LLM instance"""
+    """Get Claude LLM instance (shared by every chain and retriever)"""
     return ChatAnthropic(
         model="claude-3-5-sonnet-20241022",
         anthropic_api_key=os.getenv("CLAUDE_API_KEY"),
@@ -38,8 +141,9 @@ def get_claude_api_key():
     """Get Claude API key"""
     return os.getenv("CLAUDE_API_KEY")
 
+@lru_cache(maxsize=1)
 def get_langsmith_integration():
-    """Get LangSmith integration if available"""
+    """Get LangSmith integration if available (one client per process)"""
     if os.getenv("LANGSMITH_API_KEY"):
         try:
             from langsmith_integration import LangSmithIntegration
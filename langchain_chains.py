@@ -145,63 +145,56 @@ Answer:"""
         return []
 
 
+PREAMBLE = """You are a helpful assistant for Foodhub internal guides. Answer the user's question using the provided documentation.
+
+- If the question is vague or lacks context, ask for clarification
+- Be concise and easy to read on mobile
+- List steps clearly if applicable
+- Don't mention documents or sources unless specifically asked"""
+
+HISTORY_PREAMBLE = """You are a helpful assistant for Foodhub internal guides. Answer the user's question using the provided documentation and chat history.
+
+- If the question is vague or lacks context, ask for clarification
+- Be concise and easy to read on mobile
+- List steps clearly if applicable
+- Don't mention documents or sources unless specifically asked
+- Use the chat history to provide contextual responses"""
+
+
 class StreamingQA:
     """For streaming responses (used with Telegram bot)"""
 
     def __init__(self, retriever):
         self.retriever = retriever
-        self.llm = get_llm()
 
     def build_prompt(self, question, user_id=None, chat_history=None):
-        """Build prompt with retrieved context"""
+        """Build Claude message content blocks with retrieved context"""
         # Get relevant documents
         try:
             docs = self.retriever.get_relevant_documents(question)
-            context = "\n\n".join([f"{i + 1}. {doc.page_content.strip()}"
+            # Contents are stripped at load/split time, see LangChainRetrieval.load_documents
+            context = "\n\n".join([f"{i + 1}. {doc.page_content}"
                                    for i, doc in enumerate(docs[:TOP_K])])
         except Exception as e:
             print(f"Retrieval error: {e}")
             context = "No relevant documentation found."
 
-        # Build prompt with or without history
+        # Stable blocks go first; the breakpoint after the documentation caches the
+        # preamble + context prefix (the preamble alone is below the 1024-token minimum)
+        preamble = HISTORY_PREAMBLE if chat_history else PREAMBLE
+        prompt = [
+            {"type": "text", "text": preamble},
+            {"type": "text", "text": f"Documentation:\n{context}", "cache_control": {"type": "ephemeral"}}
+        ]
+
         if chat_history:
             history_text = "\n".join([
                 f"{'Human' if isinstance(msg, BaseMessage) and msg.type == 'human' else 'Assistant'}: {msg.content}"
                 for msg in chat_history[-6:]  # Last 6 messages
             ])
+            prompt.append({"type": "text", "text": f"Previous conversation:\n{history_text}"})
 
-            prompt = f"""You are a helpful assistant for Foodhub internal guides. Answer the user's question using the provided documentation and chat history.
-
-- If the question is vague or lacks context, ask for clarification
-- Be concise and easy to read on mobile
-- List steps clearly if applicable
-- Don't mention documents or sources unless specifically asked
-- Use the chat history to provide contextual responses
-
-Previous conversation:
-{history_text}
-
-Documentation:
-{context}
-
-Question: {question}
-
-Answer:"""
-        else:
-            prompt = f"""You are a helpful assistant for Foodhub internal guides. Answer the user's question using the provided documentation.
-
-- If the question is vague or lacks context, ask for clarification
-- Be concise and easy to read on mobile
-- List steps clearly if applicable
-- Don't mention documents or sources unless specifically asked
-
-Documentation:
-{context}
-
-Question: {question}
-
-Answer:"""
-
+        prompt.append({"type": "text", "text": f"Question: {question}\n\nAnswer:"})
         return prompt
 
 
@@ -1,10 +1,25 @@
 import os
+import json
+import pickle
+import tempfile
+import faiss
 from langchain_community.document_loaders import DirectoryLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain.retrievers import EnsembleRetriever, MultiQueryRetriever
 from langchain_community.retrievers import BM25Retriever
-from config import get_embeddings, get_llm, ARTICLE_DIR, VECTOR_STORE_PATH, CHUNK_SIZE, CHUNK_OVERLAP
+from config import (get_embeddings, get_llm, get_index_type, get_vectorstore_settings,
+                    ARTICLE_DIR, VECTOR_STORE_PATH, VECTOR_STORE_SETTINGS_FILE, BM25_INDEX_PATH, CHUNK_SIZE, CHUNK_OVERLAP)
+
+
+def latest_article_mtime():
+    """Newest modification time across the article directory and its files"""
+    with os.scandir(ARTICLE_DIR) as entries:
+        # DirEntry.stat() reuses the data scandir already fetched where the OS allows
+        file_mtimes = [entry.stat().st_mtime for entry in entries if entry.name.endswith(".txt")]
+    return max([os.path.getmtime(ARTICLE_DIR), *file_mtimes])
 
 
 class LangChainRetrieval:
@@ -22,9 +37,14 @@ class LangChainRetrieval:
             ARTICLE_DIR,
             glob="*.txt",
             loader_cls=TextLoader,
-            loader_kwargs={'encoding': 'utf-8'}
+            loader_kwargs={'encoding': 'utf-8'},
+            use_multithreading=True,  # File reads are I/O bound, overlap them
+            max_concurrency=os.cpu_count() or 4
         )
         self.documents = loader.load()
+        # Strip once here so prompts get byte-identical context without per-query copies
+        for doc in self.documents:
+            doc.page_content = doc.page_content.strip()
         print(f"Loaded {len(self.documents)} documents")
         return self.documents
 
@@ -46,22 +66,95 @@ class LangChainRetrieval:
 
     def create_vectorstore(self, force_recreate=False):
         """Create or load FAISS vector store"""
-        if os.path.exists(VECTOR_STORE_PATH) and not force_recreate:
+        if os.path.exists(VECTOR_STORE_PATH) and not force_recreate and self.vectorstore_is_current():
             print("Loading existing vector store...")
-            self.vectorstore = FAISS.load_local(
-                VECTOR_STORE_PATH,
-                self.embeddings,
-                allow_dangerous_deserialization=True  # Safe since we created this file
-            )
+            self.vectorstore = self.load_vectorstore()
         else:
+            if os.path.exists(VECTOR_STORE_PATH) and not force_recreate:
+                print("Vector store was built with different chunking, encoder or index settings, rebuilding...")
             print("Creating new vector store...")
             chunks = self.create_chunks()
-            self.vectorstore = FAISS.from_documents(chunks, self.embeddings)
+            self.vectorstore = self.build_vectorstore(chunks)
             # Save for future use
-            self.vectorstore.save_local(VECTOR_STORE_PATH)
+            self.save_vectorstore()
             print("Vector store saved")
         return self.vectorstore
 
+    def save_vectorstore(self):
+        """Save the vector store without rewriting files other processes have mapped"""
+        os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
+        parent_dir = os.path.dirname(os.path.abspath(VECTOR_STORE_PATH))
+        # Same filesystem as the store, so os.replace is an atomic rename
+        with tempfile.TemporaryDirectory(dir=parent_dir, prefix=".vectorstore-") as tmp_dir:
+            self.vectorstore.save_local(tmp_dir)
+            with open(os.path.join(tmp_dir, VECTOR_STORE_SETTINGS_FILE), "w", encoding="utf-8") as f:
+                json.dump(get_vectorstore_settings(self.vectorstore.index.ntotal), f, indent=2)
+
+            # Drop the old settings first, so a crash mid-swap leaves a store that gets rebuilt
+            settings_path = os.path.join(VECTOR_STORE_PATH, VECTOR_STORE_SETTINGS_FILE)
+            if os.path.exists(settings_path):
+                os.remove(settings_path)
+            # Renamed files get new inodes, so processes mapping the old index keep reading it
+            for name in ("index.faiss", "index.pkl", VECTOR_STORE_SETTINGS_FILE):
+                os.replace(os.path.join(tmp_dir, name), os.path.join(VECTOR_STORE_PATH, name))
+
+    def vectorstore_is_current(self):
+        """Check the saved store matches the current chunking, encoder and index settings"""
+        settings_path = os.path.join(VECTOR_STORE_PATH, VECTOR_STORE_SETTINGS_FILE)
+        if not os.path.exists(settings_path):
+            return False  # Built before settings were recorded
+        with open(settings_path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        # The index type depends on corpus size, so expect the one built for the saved vector count
+        return saved == get_vectorstore_settings(saved.get("num_vectors", 0))
+
+    def load_vectorstore(self):
+        """Load the saved FAISS index memory-mapped and read-only"""
+        # Mapped pages live in the OS page cache, so every bot process shares one copy
+        # IO_FLAG_MMAP_IFC (faiss >= 1.11) maps Flat/SQ codes; plain IO_FLAG_MMAP only maps IVF lists
+        index = faiss.read_index(
+            os.path.join(VECTOR_STORE_PATH, "index.faiss"),
+            faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+        )
+        # Same layout FAISS.save_local writes
+        with open(os.path.join(VECTOR_STORE_PATH, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)  # Safe since we created this file
+
+        return FAISS(
+            self.embeddings,
+            index,
+            docstore,
+            index_to_docstore_id,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+
+    def build_vectorstore(self, chunks):
+        """Embed chunks into a (optionally quantized) FAISS index"""
+        texts = [chunk.page_content for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        vectors = self.embeddings.encode(texts)
+
+        index_type = get_index_type(len(vectors))
+
+        # Embeddings are L2-normalized, so inner product ranks the same as cosine
+        # Scalar quantizers need a training pass to learn per-dimension ranges
+        index = faiss.index_factory(vectors.shape[1], index_type, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        if index_type.startswith("HNSW"):
+            hnsw = faiss.downcast_index(index).hnsw
+            hnsw.efConstruction = 200
+            hnsw.efSearch = 64  # Saved with the index, trades a little speed for recall
+
+        vectorstore = FAISS(
+            self.embeddings,
+            index,
+            InMemoryDocstore(),
+            {},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        vectorstore.add_embeddings(zip(texts, vectors), metadatas=metadatas)
+        return vectorstore
+
     def create_basic_retriever(self, k=5):
         """Create basic semantic retriever"""
         if not self.vectorstore:
@@ -80,17 +173,49 @@ class LangChainRetrieval:
             parser_key="lines"
         )
 
+    def create_bm25_retriever(self, k=5, force_recreate=False):
+        """Create or load persisted BM25 keyword retriever"""
+        index_is_fresh = (
+            os.path.exists(BM25_INDEX_PATH)
+            and os.path.getmtime(BM25_INDEX_PATH) >= latest_article_mtime()
+        )
+        bm25_retriever = None
+        if index_is_fresh and not force_recreate:
+            print("Loading existing BM25 index...")
+            try:
+                with open(BM25_INDEX_PATH, "rb") as f:
+                    bm25_retriever = pickle.load(f)  # Safe since we created this file
+            except (EOFError, pickle.UnpicklingError, AttributeError) as e:
+                print(f"BM25 index is unreadable ({e}), rebuilding...")
+
+        if bm25_retriever is None:
+            if not self.documents:
+                self.load_documents()
+
+            print("Creating new BM25 index...")
+            bm25_retriever = BM25Retriever.from_documents(self.documents)
+            # Save for future use, dumping to a temp file so readers never see a partial pickle
+            index_dir = os.path.dirname(os.path.abspath(BM25_INDEX_PATH))
+            fd, tmp_path = tempfile.mkstemp(dir=index_dir, prefix=".bm25-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(bm25_retriever, f)
+                os.replace(tmp_path, BM25_INDEX_PATH)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            print("BM25 index saved")
+
+        bm25_retriever.k = k
+        return bm25_retriever
+
     def create_hybrid_retriever(self, k=5):
         """Create ensemble retriever combining semantic and keyword search"""
-        if not self.documents:
-            self.load_documents()
-
         # Create semantic retriever
         semantic_retriever = self.create_basic_retriever(k)
 
         # Create BM25 keyword retriever
-        bm25_retriever = BM25Retriever.from_documents(self.documents)
-        bm25_retriever.k = k
+        bm25_retriever = self.create_bm25_retriever(k)
 
         # Combine with ensemble
         ensemble_retriever = EnsembleRetriever(
@@ -1,18 +1,51 @@
 import os
+import re
 import time
+import asyncio
+import httpx
 import telebot
-from threading import Thread
+from telebot.async_telebot import AsyncTeleBot
 from langchain.schema import HumanMessage, AIMessage
 import anthropic
-from config import get_telegram_token, get_claude_api_key, get_langsmith_integration
+from config import (get_telegram_token, get_claude_api_key, get_langsmith_integration,
+                    MAX_CONCURRENT_STREAMS, STREAM_EDIT_INTERVAL, STREAM_EDIT_MIN_CHARS, MIN_QUERY_WORDS)
 from langchain_retrieval import LangChainRetrieval
 from langchain_chains import LangChainQA, StreamingQA
 
+GREETINGS = frozenset({
+    "hi", "hello", "hey", "hiya", "yo", "good morning", "good afternoon", "good evening",
+    "thanks", "thank you", "thanks a lot", "thx", "ty", "ok", "okay", "cool", "great",
+    "bye", "goodbye"
+})
+TRIVIAL_QUERY_REPLY = "Please ask a specific question about Foodhub operations."
+
+
+def is_trivial_query(text, has_history=False):
+    """Check whether a message can't be answered from the knowledge base"""
+    words = re.findall(r"\w+", text.lower())
+    # Greetings and punctuation-only messages ("?", "...") give retrieval nothing to search for
+    if not words or " ".join(words) in GREETINGS:
+        return True
+    # Short follow-ups ("why?", "more") are fine once there's a conversation to lean on
+    return not has_history and len(words) < MIN_QUERY_WORDS
+
 
 class LangChainTelegramBot:
     def __init__(self):
-        self.bot = telebot.TeleBot(get_telegram_token())
-        self.claude = anthropic.Anthropic(api_key=get_claude_api_key())
+        self.bot = AsyncTeleBot(get_telegram_token())
+        # Keep Claude connections alive across messages; HTTP/2 multiplexes concurrent streams
+        self.claude = anthropic.AsyncAnthropic(
+            api_key=get_claude_api_key(),
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=MAX_CONCURRENT_STREAMS,
+                    max_connections=MAX_CONCURRENT_STREAMS * 2
+                ),
+                timeout=60.0
+            )
+        )
+        self.claude_slots = asyncio.Semaphore(MAX_CONCURRENT_STREAMS)
         self.langsmith = get_langsmith_integration()  # Add LangSmith integration
 
         # Setup retrieval system
@@ -38,7 +71,7 @@ class LangChainTelegramBot:
         """Setup Telegram bot message handlers"""
 
         @self.bot.message_handler(commands=['start'])
-        def handle_start(message):
+        async def handle_start(message):
             welcome_msg = """🤖 Welcome to the Foodhub Knowledge Assistant!
 
 I can help you find information from our internal documentation. Just ask me any question about:
@@ -57,10 +90,10 @@ Commands:
 /clear - Clear our conversation history
 /help - Show this message"""
 
-            self.bot.send_message(message.chat.id, welcome_msg)
+            await self.bot.send_message(message.chat.id, welcome_msg)
 
         @self.bot.message_handler(commands=['help'])
-        def handle_help(message):
+        async def handle_help(message):
             help_msg = """🔍 How to use this bot:
 
 1. Ask any question about Foodhub procedures
@@ -76,66 +109,80 @@ Commands:
 /clear - Start fresh conversation
 /start - Show welcome message"""
 
-            self.bot.send_message(message.chat.id, help_msg)
+            await self.bot.send_message(message.chat.id, help_msg)
 
         @self.bot.message_handler(commands=['clear'])
-        def handle_clear(message):
+        async def handle_clear(message):
             user_id = str(message.from_user.id)
             self.qa_system.clear_user_memory(user_id)
-            self.bot.send_message(message.chat.id, "✅ Conversation history cleared! What would you like to know?")
+            await self.bot.send_message(message.chat.id, "✅ Conversation history cleared! What would you like to know?")
 
         @self.bot.message_handler(func=lambda m: True)
-        def handle_message(message):
+        async def handle_message(message):
             chat_id = message.chat.id
             user_id = str(message.from_user.id)
             user_input = message.text
 
+            # Greetings and opening one-word messages skip retrieval and Claude entirely
+            has_history = bool(self.qa_system.get_user_conversation_history(user_id))
+            if is_trivial_query(user_input, has_history):
+                await self.bot.send_message(chat_id, TRIVIAL_QUERY_REPLY)
+                return
+
             # Send initial "thinking" message
-            sent_msg = self.bot.send_message(chat_id, "Thinking..")
+            sent_msg = await self.bot.send_message(chat_id, "Thinking..")
             message_id = sent_msg.message_id
 
-            # Start streaming response in background
-            Thread(
-                target=self.stream_response,
-                args=(chat_id, message_id, user_input, user_id)
-            ).start()
+            # Each update runs in its own task, so streaming here doesn't block other chats
+            await self.stream_response(chat_id, message_id, user_input, user_id)
 
-    def stream_response(self, chat_id, message_id, user_query, user_id):
+    async def stream_response(self, chat_id, message_id, user_query, user_id):
         """Generate and stream Claude response using LangChain"""
         try:
             # Get conversation history from LangChain memory
             chat_history = self.qa_system.get_user_conversation_history(user_id)
 
-            # Build prompt with LangChain retrieval
-            prompt = self.streaming_qa.build_prompt(user_query, user_id, chat_history)
+            # Build prompt with LangChain retrieval (query encoding is CPU work, keep it off the loop)
+            loop = asyncio.get_running_loop()
+            prompt = await loop.run_in_executor(
+                None, self.streaming_qa.build_prompt, user_query, user_id, chat_history
+            )
 
             # Stream response from Claude
             response_text = ""
+            sent_text = ""
             last_update = time.time()
 
-            with self.claude.messages.stream(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=1000,
-                    messages=[{"role": "user", "content": prompt}]
-            ) as stream:
-                for text in stream.text_stream:
-                    response_text += text
-
-                    # Update message every 1.5 seconds
-                    if time.time() - last_update >= 1.5:
-                        try:
-                            self.bot.edit_message_text(
-                                response_text[:4096],
-                                chat_id,
-                                message_id
-                            )
+            async with self.claude_slots:
+                async with self.claude.messages.stream(
+                        model="claude-3-5-sonnet-20241022",
+                        max_tokens=1000,
+                        messages=[{"role": "user", "content": prompt}]
+                ) as stream:
+                    async for text in stream.text_stream:
+                        response_text += text
+
+                        # Update at most every STREAM_EDIT_INTERVAL seconds, and only once
+                        # enough new text has arrived to be worth another API call
+                        visible_text = response_text[:4096]
+                        if (time.time() - last_update >= STREAM_EDIT_INTERVAL
+                                and len(visible_text) - len(sent_text) >= STREAM_EDIT_MIN_CHARS):
+                            # Count failed edits too, so a rate-limited chat isn't retried every token
                             last_update = time.time()
-                        except Exception:
-                            pass
-
-            # Final update
+                            try:
+                                await self.bot.edit_message_text(
+                                    visible_text,
+                                    chat_id,
+                                    message_id
+                                )
+                                sent_text = visible_text
+                            except Exception:
+                                pass
+
+            # Final update (Telegram rejects edits that don't change the text)
             final_response = response_text[:4096]
-            self.bot.edit_message_text(final_response, chat_id, message_id)
+            if final_response != sent_text:
+                await self.bot.edit_message_text(final_response, chat_id, message_id)
 
             # Update LangChain memory manually
             memory = self.qa_system.get_user_memory(user_id)
@@ -144,14 +191,14 @@ Commands:
 
         except Exception as e:
             error_msg = f"❌ Sorry, I encountered an error: {str(e)}"
-            self.bot.edit_message_text(error_msg, chat_id, message_id)
+            await self.bot.edit_message_text(error_msg, chat_id, message_id)
 
     def run(self):
         """Start the bot"""
         print("🚀 LangChain Telegram bot is running...")
         print("Press Ctrl+C to stop")
         try:
-            self.bot.infinity_polling(timeout=60, long_polling_timeout=60)
+            asyncio.run(self.bot.infinity_polling(timeout=60))
         except KeyboardInterrupt:
             print("\n🛑 Bot stopped by user")
         except Exception as e:
@@ -196,6 +243,11 @@ class SimpleLangChainBot:
             user_id = str(message.from_user.id)
             user_input = message.text
 
+            has_history = bool(self.qa_system.get_user_conversation_history(user_id))
+            if is_trivial_query(user_input, has_history):
+                self.bot.send_message(chat_id, TRIVIAL_QUERY_REPLY)
+                return
+
             # Send "thinking" message
             thinking_msg = self.bot.send_message(chat_id, "🤔 Thinking...")
 
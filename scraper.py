@@ -1,5 +1,5 @@
-from playwright.sync_api import sync_playwright
-import time
+from playwright.async_api import async_playwright
+import asyncio
 import os
 import csv
 
@@ -7,38 +7,84 @@ import csv
 SAVE_DIR = "scraped_articles"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
-# Starting URL - modify this for different knowledge bases
-URL = "https://uni.foodhub.com/knowledge/manual/product/article/my-business-hub-login"
-
-with sync_playwright() as p:
-    user_data_dir = "auth_storage"
-
-    print("Launching browser...")
-    context = p.chromium.launch_persistent_context(
-        user_data_dir,
-        headless=False,
-    )
-    page = context.pages[0] if context.pages else context.new_page()
-
-    print(f"Navigating to: {URL}")
-    page.goto(URL)
-
-    print("Scroll manually to load all articles...")
-    input("Press ENTER when finished scrolling.\n")
-
-    print("Collecting article links...")
-    links = page.eval_on_selector_all(
-        "a",
-        "elements => elements.map(el => el.href).filter(href => href.includes('/article/'))"
-    )
-
-    # Save to CSV
-    csv_file = os.path.join(SAVE_DIR, "article_links.csv")
-    with open(csv_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["link"])
-        for link in links:
-            writer.writerow([link])
-
-    print(f"Saved {len(links)} links to {csv_file}")
-    context.close()
\ No newline at end of file
+# Starting URLs - add more entries to harvest several knowledge base sections at once
+URLS = [
+    "https://uni.foodhub.com/knowledge/manual/product/article/my-business-hub-login",
+]
+
+# Keep scrolling until the page stops growing, so lazily loaded articles are rendered.
+# A slow lazy-load can leave the height flat for one check, so several quiet checks in a row
+# count as done, and endlessly growing pages stop after SCROLL_MAX_STEPS.
+SCROLL_PAUSE_MS = 500
+SCROLL_STABLE_CHECKS = 4
+SCROLL_MAX_STEPS = 200
+
+AUTO_SCROLL_JS = """async ([pauseMs, stableChecks, maxSteps]) => {
+    let lastHeight = 0;
+    let unchanged = 0;
+    for (let step = 0; step < maxSteps; step++) {
+        window.scrollTo(0, document.body.scrollHeight);
+        await new Promise(resolve => setTimeout(resolve, pauseMs));
+        const height = document.body.scrollHeight;
+        unchanged = height === lastHeight ? unchanged + 1 : 0;
+        if (unchanged >= stableChecks) {
+            return true;
+        }
+        lastHeight = height;
+    }
+    return false;
+}"""
+
+
+async def scrape_links(context, url, writer, seen):
+    """Load one starting page, scroll it fully and write new article links"""
+    page = await context.new_page()
+    try:
+        print(f"Navigating to: {url}")
+        await page.goto(url)
+
+        print(f"Scrolling to load all articles: {url}")
+        settled = await page.evaluate(
+            AUTO_SCROLL_JS, [SCROLL_PAUSE_MS, SCROLL_STABLE_CHECKS, SCROLL_MAX_STEPS]
+        )
+        if not settled:
+            print(f"Warning: {url} kept growing after {SCROLL_MAX_STEPS} scrolls, links may be missing")
+
+        links = await page.locator("a").evaluate_all(
+            "elements => elements.map(el => el.href).filter(href => href.includes('/article/'))"
+        )
+
+        # Write rows as each page finishes instead of waiting for all of them
+        # dict.fromkeys drops repeats within the page (nav + body) while keeping page order
+        new_links = [link for link in dict.fromkeys(links) if link not in seen]
+        seen.update(new_links)
+        writer.writerows([link] for link in new_links)
+        print(f"Collected {len(new_links)} new links from {url}")
+    finally:
+        await page.close()
+
+
+async def main():
+    async with async_playwright() as p:
+        user_data_dir = "auth_storage"
+
+        print("Launching browser...")
+        context = await p.chromium.launch_persistent_context(
+            user_data_dir,
+            headless=False,
+        )
+
+        # Save to CSV
+        csv_file = os.path.join(SAVE_DIR, "article_links.csv")
+        seen = set()
+        with open(csv_file, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["link"])
+            await asyncio.gather(*[scrape_links(context, url, writer, seen) for url in URLS])
+
+        print(f"Saved {len(seen)} links to {csv_file}")
+        await context.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
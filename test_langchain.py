@@ -4,10 +4,14 @@ Test script for LangChain RAG system
 Run this to verify everything is working correctly
 """
 
+import io
 import os
 import sys
+import tempfile
+import langchain_retrieval
 from langchain_retrieval import LangChainRetrieval
-from langchain_chains import LangChainQA
+from langchain_chains import LangChainQA, StreamingQA
+from langchain.schema import Document, HumanMessage, AIMessage
 
 
 def test_document_loading():
@@ -174,6 +178,196 @@ def test_memory():
         return False
 
 
+def test_streaming_prompt():
+    """Test streaming prompt block order and cache breakpoint placement"""
+    print("\nTesting Streaming Prompt...")
+
+    class StaticRetriever:
+        def get_relevant_documents(self, query):
+            return [Document(page_content="Refunds are issued within 5 days.")]
+
+    try:
+        streaming_qa = StreamingQA(StaticRetriever())
+        question = "How long do refunds take?"
+        history = [HumanMessage(content="Hi there"), AIMessage(content="Hello!")]
+
+        without_history = streaming_qa.build_prompt(question)
+        with_history = streaming_qa.build_prompt(question, chat_history=history)
+
+        texts = [block["text"] for block in with_history]
+        checks = [
+            len(without_history) == 3,
+            len(with_history) == 4,
+            all(block["type"] == "text" for block in with_history),
+            texts[0].startswith("You are a helpful assistant"),
+            texts[1].startswith("Documentation:\n1. Refunds are issued"),
+            texts[2].startswith("Previous conversation:\nHuman: Hi there"),
+            texts[3] == f"Question: {question}\n\nAnswer:",
+            # Only the documentation block carries a cache breakpoint
+            [("cache_control" in block) for block in with_history] == [False, True, False, False],
+            [("cache_control" in block) for block in without_history] == [False, True, False]
+        ]
+
+        if not all(checks):
+            print(f"Streaming prompt checks failed: {checks}")
+            return False
+
+        print("Streaming prompt blocks are ordered and cached correctly")
+        return True
+
+    except Exception as e:
+        print(f"Streaming prompt test failed: {e}")
+        return False
+
+
+def test_cleaner_lines():
+    """Test scraped-article cleaning skips metadata and stops at feedback"""
+    print("\nTesting Article Cleaner...")
+
+    from cleaner import clean_lines
+
+    scraped = io.StringIO(
+        "How to issue a refund\n"
+        "12 Mar, 10:30 AM\n"
+        "   \n"
+        "45 Views\n"
+        "1 View\n"
+        "3 comments\n"
+        "  Open the order and press Refund.  \n"
+        "Updated 12 Mar, 10:30 AM by support\n"
+        "Was this article helpful?\n"
+        "Yes No\n"
+    )
+
+    try:
+        cleaned = list(clean_lines(scraped))
+        expected = [
+            "How to issue a refund",
+            "Open the order and press Refund.",
+            # Dates only count as metadata at the start of a line
+            "Updated 12 Mar, 10:30 AM by support"
+        ]
+
+        if cleaned != expected:
+            print(f"Cleaner output mismatch: {cleaned}")
+            return False
+
+        print("Cleaner removed metadata lines and stopped at the feedback section")
+        return True
+
+    except Exception as e:
+        print(f"Cleaner test failed: {e}")
+        return False
+
+
+def test_trivial_query():
+    """Test greetings and short messages are caught before retrieval"""
+    print("\nTesting Trivial Query Gate...")
+
+    from langchain_telegram_bot import is_trivial_query
+
+    try:
+        cases = [
+            # (message, has_history, expected)
+            ("Thanks!", False, True),
+            ("Thanks!", True, True),
+            ("Good morning :)", True, True),
+            ("refunds", False, True),
+            ("refunds", True, False),
+            ("Why?", True, False),
+            ("???", False, True),
+            ("...", True, True),
+            ("How do refunds work?", False, False)
+        ]
+        mismatches = [
+            (text, has_history)
+            for text, has_history, expected in cases
+            if is_trivial_query(text, has_history) != expected
+        ]
+
+        if mismatches:
+            print(f"Trivial query mismatches: {mismatches}")
+            return False
+
+        print("Greetings and short messages gated correctly, with and without history")
+        return True
+
+    except Exception as e:
+        print(f"Trivial query test failed: {e}")
+        return False
+
+
+def test_bm25_persistence():
+    """Test BM25 index is reused while fresh and rebuilt once stale or unreadable"""
+    print("\nTesting BM25 Persistence...")
+
+    original_paths = (langchain_retrieval.ARTICLE_DIR, langchain_retrieval.BM25_INDEX_PATH)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            article_dir = os.path.join(tmp, "articles")
+            index_path = os.path.join(tmp, "bm25.pkl")
+            os.makedirs(article_dir)
+            article_path = os.path.join(article_dir, "refunds.txt")
+            with open(article_path, "w", encoding="utf-8") as f:
+                f.write("# refunds\n\nRefunds are issued within 5 days.")
+
+            langchain_retrieval.ARTICLE_DIR = article_dir
+            langchain_retrieval.BM25_INDEX_PATH = index_path
+
+            # BM25 needs neither the embeddings model nor the LLM, so skip loading them
+            retrieval = LangChainRetrieval.__new__(LangChainRetrieval)
+            retrieval.documents = None
+
+            retrieval.create_bm25_retriever(k=1)
+            built = os.path.exists(index_path)
+
+            # Fresh pickle: loaded without touching the article files
+            retrieval.documents = None
+            loaded = retrieval.create_bm25_retriever(k=1)
+            reused = retrieval.documents is None
+            results = loaded.get_relevant_documents("refunds")
+            round_trip = len(results) == 1 and "5 days" in results[0].page_content
+
+            # Article edited after the pickle was written: stale, so rebuilt
+            index_mtime = os.path.getmtime(index_path)
+            os.utime(article_path, (index_mtime + 10, index_mtime + 10))
+            retrieval.create_bm25_retriever(k=1)
+            rebuilt = retrieval.documents is not None
+
+            # Truncated pickle that still looks fresh: rebuilt instead of crashing
+            with open(index_path, "r+b") as f:
+                f.truncate(16)
+            os.utime(index_path, (index_mtime + 20, index_mtime + 20))
+            retrieval.documents = None
+            recovered = retrieval.create_bm25_retriever(k=1)
+            repaired = (
+                retrieval.documents is not None
+                and len(recovered.get_relevant_documents("refunds")) == 1
+            )
+            no_temp_files = sorted(os.listdir(tmp)) == ["articles", "bm25.pkl"]
+
+        checks = {
+            "built": built,
+            "reused": reused,
+            "round_trip": round_trip,
+            "rebuilt": rebuilt,
+            "repaired": repaired,
+            "no_temp_files": no_temp_files
+        }
+        if not all(checks.values()):
+            print(f"BM25 persistence checks failed: {checks}")
+            return False
+
+        print("BM25 index reused while fresh and rebuilt when stale or truncated")
+        return True
+
+    except Exception as e:
+        print(f"BM25 persistence test failed: {e}")
+        return False
+    finally:
+        langchain_retrieval.ARTICLE_DIR, langchain_retrieval.BM25_INDEX_PATH = original_paths
+
+
 def test_integration():
     """Test full integration"""
     print("\nTesting Full Integration...")
@@ -220,6 +414,9 @@ def test_integration():
         return False
 
 
+OFFLINE_TESTS = {"prompt", "cleaner", "trivial", "bm25"}
+
+
 def check_requirements():
     """Check if all required files and directories exist"""
     print("Checking Requirements...")
@@ -268,6 +465,10 @@ def run_all_tests():
         ("Retrievers", test_retrievers),
         ("QA Chains", test_qa_chains),
         ("Memory System", test_memory),
+        ("Streaming Prompt", test_streaming_prompt),
+        ("Article Cleaner", test_cleaner_lines),
+        ("Trivial Query Gate", test_trivial_query),
+        ("BM25 Persistence", test_bm25_persistence),
         ("Full Integration", test_integration)
     ]
 
@@ -310,11 +511,16 @@ if __name__ == "__main__":
             "retriever": test_retrievers,
             "qa": test_qa_chains,
             "memory": test_memory,
+            "prompt": test_streaming_prompt,
+            "cleaner": test_cleaner_lines,
+            "trivial": test_trivial_query,
+            "bm25": test_bm25_persistence,
             "integration": test_integration
         }
 
         if test_name in test_map:
-            if check_requirements():
+            # Offline tests don't need articles or API keys
+            if test_name in OFFLINE_TESTS or check_requirements():
                 test_map[test_name]()
         else:
             print(f"Unknown test: {test_name}")